@@ -36,6 +36,7 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 import base64
+import copy
 import logging
 import os
 import ssl
@@ -61,10 +62,34 @@ except ImportError as exc:
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     HAS_REQUESTS = True
 except ImportError:
     HAS_REQUESTS = False
 
+try:
+    # h2 is required by httpx for HTTP/2
+    import h2       # pylint: disable=unused-import
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# exceptions raised by requests or httpx
+HTTP_ERRORS = tuple(
+    ([requests.exceptions.HTTPError] if HAS_REQUESTS else [])
+    + ([httpx.HTTPStatusError] if HAS_HTTPX else []))
+CONNECTION_ERRORS = tuple(
+    ([requests.exceptions.ConnectionError] if HAS_REQUESTS else [])
+    + ([httpx.TransportError] if HAS_HTTPX else []))
+
 HAS_SF_SDK = False
 SF_BYTE_MAP = dict(
     # Management GUI displays 1024 ** 3 as 1.1 GB, thus use 1000.
@@ -208,7 +233,8 @@ def get_feature(module, feature_name):
         svm_allowable_protocols_zapi=['cifs', 'fcp', 'iscsi', 'nvme', 'nfs', 'ndmp', 'http'],
         max_files_change_threshold=1,           # percentage of increase/decrease required to trigger a modify action
         warn_or_fail_on_fabricpool_backend_change='fail',
-        no_cserver_ems=False                    # when True, don't attempt to find cserver and don't send cserver EMS
+        no_cserver_ems=False,                   # when True, don't attempt to find cserver and don't send cserver EMS
+        use_http2=False,                        # when True, use httpx with HTTP/2 rather than requests for REST calls
     )
 
     if module.params['feature_flags'] is not None and feature_name in module.params['feature_flags']:
@@ -606,6 +632,11 @@ if HAS_NETAPP_LIB:
 
 class OntapRestAPI(object):
     ''' wrapper to send requests to ONTAP REST APIs '''
+    # one session per (hostname, username), so that connections are reused across calls in the same process
+    _sessions = {}
+    # ETag and response for GET requests, when ONTAP reports an ETag, to send conditional requests
+    _etags = {}
+
     def __init__(self, module, timeout=60, host_options=None):
         self.host_options = module.params if host_options is None else host_options
         self.module = module
@@ -636,6 +667,7 @@ class OntapRestAPI(object):
         self.errors = []
         self.debug_logs = []
         self.auth_method = set_auth_method(self.module, self.username, self.password, self.cert_filepath, self.key_filepath)
+        self.use_http2 = has_feature(module, 'use_http2')
         self.check_required_library()
         if has_feature(module, 'trace_apis'):
             logging.basicConfig(filename=LOG_FILE, level=logging.DEBUG, format='%(asctime)s %(levelname)-8s %(message)s')
@@ -689,6 +721,68 @@ class OntapRestAPI(object):
     def check_required_library(self):
         if not HAS_REQUESTS:
             self.module.fail_json(msg=missing_required_lib('requests'))
+        if self.use_http2 and not HAS_HTTPX:
+            self.module.fail_json(msg=missing_required_lib('httpx[http2]'))
+
+    def get_session(self):
+        ''' return a requests session with connection pooling, shared for the same (hostname, username)
+            or an HTTP/2 httpx client when use_http2 is set
+        '''
+        if self.use_http2:
+            return self.get_http2_client()
+        key = (self.hostname, self.username)
+        session = OntapRestAPI._sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            retries = self.get_retry_policy()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retries)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            OntapRestAPI._sessions[key] = session
+        return session
+
+    @staticmethod
+    def get_retry_policy():
+        ''' retry connection errors, and 502/503/504 for read only methods
+            a read timeout or a 5xx error on POST, PATCH, or DELETE may mean the request was processed, so these are not retried
+        '''
+        methods = frozenset(['GET', 'HEAD', 'OPTIONS'])
+        # method_whitelist was renamed to allowed_methods in urllib3 1.26
+        methods_kwarg = 'allowed_methods' if hasattr(Retry, 'DEFAULT_ALLOWED_METHODS') else 'method_whitelist'
+        kwargs = {methods_kwarg: methods}
+        return Retry(total=3, connect=3, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False, **kwargs)
+
+    def get_http2_client(self):
+        ''' httpx sets verify and cert on the client rather than on each request, so they are part of the key '''
+        key = ('http2', self.hostname, self.username, self.verify, self.cert_filepath, self.key_filepath)
+        client = OntapRestAPI._sessions.get(key)
+        if client is None:
+            cert = None
+            if self.auth_method == 'single_cert':
+                cert = self.cert_filepath
+            elif self.auth_method == 'cert_key':
+                cert = (self.cert_filepath, self.key_filepath)
+            client = httpx.Client(http2=True, verify=self.verify, cert=cert,
+                                  limits=httpx.Limits(max_connections=50, max_keepalive_connections=20))
+            OntapRestAPI._sessions[key] = client
+        return client
+
+    @staticmethod
+    def encode_params_like_requests(params):
+        ''' httpx sends None as key= and True as true, requests drops None and sends True as True
+            ONTAP may reject or misread the httpx forms, so use the requests ones
+        '''
+        if not isinstance(params, dict):
+            return params
+
+        def encode(value):
+            if isinstance(value, bool):
+                return str(value)
+            if isinstance(value, (list, tuple)):
+                return [encode(item) for item in value if item is not None]
+            return value
+
+        return dict((key, encode(value)) for key, value in params.items() if value is not None)
 
     def build_headers(self, accept=None, vserver_name=None, vserver_uuid=None):
         headers = {'X-Dot-Client-App': CLIENT_APP_VERSION % self.module._name}
@@ -729,6 +823,13 @@ class OntapRestAPI(object):
         error_details = None
         if headers is None:
             headers = self.build_headers()
+        etag_key, cached = None, None
+        if method == 'GET':
+            etag_key = (url, self.username, repr(sorted(params.items())) if isinstance(params, dict) else repr(params))
+            cached = OntapRestAPI._etags.get(etag_key)
+            if cached is not None:
+                headers = dict(headers)
+                headers['If-None-Match'] = cached[0]
 
         def fail_on_non_empty_value(response):
             '''json() may fail on an empty value, but it's OK if no response is expected.
@@ -741,9 +842,11 @@ class OntapRestAPI(object):
                     raise ValueError("Expecting json, got: %s" % contents)
 
         def get_json(response):
-            ''' extract json, and error message if present '''
+            ''' extract json, and error message if present
+                orjson is faster than the json module used by requests and httpx, use it if present
+            '''
             try:
-                json = response.json()
+                json = orjson.loads(response.content) if HAS_ORJSON else response.json()
             except ValueError:
                 fail_on_non_empty_value(response)
                 return None, None
@@ -754,14 +857,27 @@ class OntapRestAPI(object):
                                             headers=headers if self.log_headers else 'redacted',
                                             auth_args=auth_args if self.log_auth_args else 'redacted')))
         try:
-            response = requests.request(method, url, verify=self.verify, params=params,
-                                        timeout=self.timeout, json=json, headers=headers, files=files, **auth_args)
+            if self.use_http2:
+                # verify and cert are set on the client
+                response = self.get_session().request(method, url, params=self.encode_params_like_requests(params), timeout=self.timeout,
+                                                      json=json, headers=headers, files=files,
+                                                      auth=auth_args.get('auth'))
+            else:
+                response = self.get_session().request(method, url, verify=self.verify, params=params,
+                                                      timeout=self.timeout, json=json, headers=headers, files=files, **auth_args)
             status_code = response.status_code
             self.log_debug(status_code, response.content)
-            # If the response was successful, no Exception will be raised
-            response.raise_for_status()
-            json_dict, json_error = get_json(response)
-        except requests.exceptions.HTTPError as err:
+            if status_code == 304 and cached is not None:
+                # not modified, reuse the previous response
+                json_dict = copy.deepcopy(cached[1])
+            else:
+                # If the response was successful, no Exception will be raised
+                response.raise_for_status()
+                json_dict, json_error = get_json(response)
+                etag = response.headers.get('ETag')
+                if etag_key is not None and etag and json_dict is not None and json_error is None:
+                    OntapRestAPI._etags[etag_key] = (etag, copy.deepcopy(json_dict))
+        except HTTP_ERRORS as err:
             try:
                 __, json_error = get_json(response)
             except (AttributeError, ValueError):
@@ -771,7 +887,7 @@ class OntapRestAPI(object):
                 error_details = str(err)
 
             # If an error was reported in the json payload, it is handled below
-        except requests.exceptions.ConnectionError as err:
+        except CONNECTION_ERRORS as err:
             self.log_error(status_code, 'Connection error: %s' % err)
             error_details = str(err)
         except Exception as err:
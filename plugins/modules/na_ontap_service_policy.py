@@ -34,8 +34,17 @@ options:
   name:
     description:
       - The name of the service policy.
-    required: true
+      - One of C(name) or C(names) is required.
+      - ONTAP query operators C(*), C(|), C(!), C(<), C(>), C(..) are not allowed in C(name) or C(names).
     type: str
+  names:
+    description:
+      - List of service policies to manage together, as an alternative to C(name).
+      - All the policies share the same C(state), C(ipspace), C(vserver), C(scope), and C(services) values.
+      - Existing policies are fetched with a single GET, new policies are created with a single POST.
+    type: list
+    elements: str
+    version_added: 22.3.0
   ipspace:
     description:
       - Name of the ipspace.
@@ -80,6 +89,18 @@ options:
     type: list
     elements: str
     version_added: 22.0.0
+  current_fact:
+    description:
+      - Current service policy record, as returned by C(na_ontap_rest_info) for C(network/ip/service-policies).
+      - When set, the module uses it rather than querying the policy, saving a GET for each policy when the records are collected with a single
+        C(na_ontap_rest_info) task.
+      - Use an empty dictionary to indicate the policy does not exist.
+      - C(uuid), C(name), C(scope), C(ipspace), and C(svm) for a SVM scoped policy, are required in the record, and C(services) to detect changes.
+      - C(name), C(svm.name), C(scope), and C(ipspace.name) must match C(name), C(vserver), C(scope), and C(ipspace) when set.
+      - The record is trusted as is, make sure it is current, especially when not in check_mode.
+      - Not supported with C(names).
+    type: dict
+    version_added: 22.3.0
 
 notes:
   - This module supports check_mode.
@@ -130,6 +151,51 @@ EXAMPLES = """
           - no_service
         vserver: "{{ vserver }}"
 
+    - name: Create or modify several service policies with the same services
+      netapp.ontap.na_ontap_service_policy:
+        state: present
+        names:
+          - "{{ service_policy_name }}_1"
+          - "{{ service_policy_name }}_2"
+        services:
+          - data_core
+          - data_nfs
+        vserver: ansibleVServer
+        hostname: "{{ netapp_hostname }}"
+        username: "{{ netapp_username }}"
+        password: "{{ netapp_password }}"
+
+    - name: Collect all service policies with a single query
+      netapp.ontap.na_ontap_rest_info:
+        gather_subset: network/ip/service-policies
+        fields:
+          - name
+          - uuid
+          - services
+          - svm
+          - scope
+          - ipspace
+        use_python_keys: true
+        hostname: "{{ netapp_hostname }}"
+        username: "{{ netapp_username }}"
+        password: "{{ netapp_password }}"
+      register: ontap_info
+
+    - name: Check service policies without querying each one
+      netapp.ontap.na_ontap_service_policy:
+        state: present
+        name: "{{ item }}"
+        services:
+          - data_core
+        vserver: ansibleVServer
+        current_fact: "{{ ontap_info.ontap_info.network_ip_service_policies.records | selectattr('name', 'equalto', item)
+                          | selectattr('svm.name', 'defined') | selectattr('svm.name', 'equalto', 'ansibleVServer') | first | default({}) }}"
+        hostname: "{{ netapp_hostname }}"
+        username: "{{ netapp_username }}"
+        password: "{{ netapp_password }}"
+      loop: "{{ service_policy_names }}"
+      check_mode: true
+
     - name: Modify service policy at cluster level
       netapp.ontap.na_ontap_service_policy:
         state: present
@@ -149,18 +215,60 @@ cd_action:
   type: str
 
 modify:
-  description: attributes that were modified if the key already exists.
+  description:
+    - attributes that were modified if the key already exists.
+    - with C(names), a dictionary of modified attributes for each policy name.
+  returned: success
+  type: dict
+
+actions:
+  description: with C(names), the create or delete action for each policy name.
   returned: success
   type: dict
 """
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+    HAS_FUTURES = True
+except ImportError:
+    HAS_FUTURES = False
+
 from ansible.module_utils.basic import AnsibleModule
 import ansible_collections.netapp.ontap.plugins.module_utils.netapp as netapp_utils
 from ansible_collections.netapp.ontap.plugins.module_utils.netapp_module import NetAppModule
-from ansible_collections.netapp.ontap.plugins.module_utils.netapp import OntapRestAPI
 from ansible_collections.netapp.ontap.plugins.module_utils import rest_generic
+import ansible_collections.netapp.ontap.plugins.module_utils.rest_response_helpers as rrh
+
+_API = 'network/ip/service-policies'
+
+# concurrent PATCH requests with names, requests pools up to 10 connections per host
+_MAX_WORKERS = 8
+
+# ONTAP query operators
+_QUERY_OPERATORS = ('*', '|', '!', '<', '>', '..')
 
-HAS_NETAPP_LIB = netapp_utils.has_netapp_lib()
+_MODIFIABLE_ATTRS = frozenset(('services',))
+
+_KNOWN_SERVICES = ['cluster_core', 'intercluster_core', 'management_core', 'management_autosupport', 'management_bgp', 'management_ems',
+                   'management_https', 'management_http', 'management_ssh', 'management_portmap', 'data_core', 'data_nfs', 'data_cifs',
+                   'data_flexcache', 'data_iscsi', 'data_s3_server', 'data_dns_server', 'data_fpolicy_client', 'management_ntp_client',
+                   'management_dns_client', 'management_ad_client', 'management_ldap_client', 'management_nis_client',
+                   'management_snmp_server', 'management_rsh_server', 'management_telnet_server', 'management_ntp_server',
+                   'data_nvme_tcp', 'backup_ndmp_control']
+
+# module specific options, the host options are added in __init__
+_ARGUMENT_SPEC = dict(
+    state=dict(type='str', choices=['present', 'absent'], default='present'),
+    name=dict(type='str'),
+    names=dict(type='list', elements='str'),
+    ipspace=dict(type='str'),
+    scope=dict(type='str', choices=['cluster', 'svm']),
+    services=dict(type='list', elements='str'),
+    vserver=dict(type='str'),
+    known_services=dict(type='list', elements='str', default=_KNOWN_SERVICES),
+    additional_services=dict(type='list', elements='str'),
+    current_fact=dict(type='dict'),
+)
 
 
 class NetAppOntapServicePolicy:
@@ -171,22 +279,7 @@ class NetAppOntapServicePolicy:
     def __init__(self):
         self.use_rest = False
         argument_spec = netapp_utils.na_ontap_host_argument_spec()
-        argument_spec.update(dict(
-            state=dict(type='str', choices=['present', 'absent'], default='present'),
-            name=dict(required=True, type='str'),
-            ipspace=dict(type='str'),
-            scope=dict(type='str', choices=['cluster', 'svm']),
-            services=dict(type='list', elements='str'),
-            vserver=dict(type='str'),
-            known_services=dict(type='list', elements='str',
-                                default=['cluster_core', 'intercluster_core', 'management_core', 'management_autosupport', 'management_bgp', 'management_ems',
-                                         'management_https', 'management_http', 'management_ssh', 'management_portmap', 'data_core', 'data_nfs', 'data_cifs',
-                                         'data_flexcache', 'data_iscsi', 'data_s3_server', 'data_dns_server', 'data_fpolicy_client', 'management_ntp_client',
-                                         'management_dns_client', 'management_ad_client', 'management_ldap_client', 'management_nis_client',
-                                         'management_snmp_server', 'management_rsh_server', 'management_telnet_server', 'management_ntp_server',
-                                         'data_nvme_tcp', 'backup_ndmp_control']),
-            additional_services=dict(type='list', elements='str')
-        ))
+        argument_spec.update(_ARGUMENT_SPEC)
 
         self.module = AnsibleModule(
             argument_spec=argument_spec,
@@ -196,7 +289,12 @@ class NetAppOntapServicePolicy:
                 ('vserver', None, ['ipspace']),
             ],
             required_one_of=[
-                ('ipspace', 'vserver')
+                ('name', 'names'),
+                ('ipspace', 'vserver'),
+            ],
+            mutually_exclusive=[
+                ('name', 'names'),
+                ('names', 'current_fact'),
             ],
             supports_check_mode=True
         )
@@ -205,18 +303,28 @@ class NetAppOntapServicePolicy:
         self.parameters = self.na_helper.set_parameters(self.module.params)
 
         # REST API is required
-        self.rest_api = OntapRestAPI(self.module)
+        self.rest_api = netapp_utils.OntapRestAPI(self.module)
         # check version
         self.rest_api.fail_if_not_rest_minimum_version('na_ontap_service_policy', 9, 8)
         self.validate_inputs()
 
     def validate_inputs(self):
+        # names are used in queries, including the query based DELETE, an operator would match other policies
+        names = self.parameters['names'] if 'names' in self.parameters else [self.parameters['name']]
+        if not names or not all(names):
+            self.module.fail_json(msg='Error: service policy names cannot be empty.  Got: %s' % names)
+        invalid_names = [name for name in names if any(char in name for char in _QUERY_OPERATORS)]
+        if invalid_names:
+            self.module.fail_json(msg='Error: service policy names cannot contain ONTAP query operators (%s).  Got: %s'
+                                  % (', '.join(_QUERY_OPERATORS), ', '.join(invalid_names)))
         services = self.parameters.get('services')
-        if services and 'no_service' in services:
-            if len(services) > 1:
+        if services is not None:
+            services_set = set(services)
+            if 'no_service' in services_set and len(services_set) > 1:
                 self.module.fail_json(msg='Error: no other service can be present when no_service is specified.  Got: %s' % services)
-            self.parameters['services'] = []
-        known_services = self.parameters.get('known_services', []) + self.parameters.get('additional_services', [])
+            # canonical ordering, without duplicates, to compare with ONTAP
+            self.parameters['services'] = sorted(services_set - set(['no_service']))
+        known_services = set(self.parameters.get('known_services', []) + self.parameters.get('additional_services', []))
         unknown_services = [service for service in self.parameters.get('services', []) if service not in known_services]
         if unknown_services:
             plural = 's' if len(services) > 1 else ''
@@ -231,12 +339,9 @@ class NetAppOntapServicePolicy:
         elif scope == 'svm' and self.parameters.get('vserver') is None:
             self.module.fail_json(msg='Error: vserver cannot be None when "scope: svm" is specified.')
 
-    def get_service_policy(self):
-        api = 'network/ip/service-policies'
-        query = {
-            'name': self.parameters['name'],
-            'fields': 'name,uuid,ipspace,services,svm,scope'
-        }
+    def build_query(self, names=None):
+        # ONTAP accepts a list of alternative values separated with |
+        query = {'name': self.parameters['name'] if names is None else '|'.join(names)}
         if self.parameters.get('vserver') is None:
             # vserser is empty for cluster
             query['scope'] = 'cluster'
@@ -245,87 +350,206 @@ class NetAppOntapServicePolicy:
 
         if self.parameters.get('ipspace') is not None:
             query['ipspace.name'] = self.parameters['ipspace']
+        return query
+
+    def get_service_policy(self):
+        api = _API
+        query = self.build_query()
+        query['fields'] = self.build_fields()
         record, error = rest_generic.get_one_record(self.rest_api, api, query)
         if error:
             msg = "Error in get_service_policy: %s" % error
             self.module.fail_json(msg=msg)
-        if record:
-            return {
-                'uuid': record['uuid'],
-                'name': record['name'],
-                'ipspace': record['ipspace']['name'],
-                'scope': record['scope'],
-                'vserver': self.na_helper.safe_get(record, ['svm', 'name']),
-                'services': record['services']
-            }
-        return None
+        return self.format_record(record) if record else None
 
-    def create_service_policy(self):
-        api = 'network/ip/service-policies'
-        body = {
-            'name': self.parameters['name']
-        }
-        if self.parameters.get('vserver') is not None:
-            body['svm.name'] = self.parameters['vserver']
+    def get_service_policies(self, names):
+        """Fetch all the policies in names with a single GET.
+           Returns a dictionary indexed by policy name, missing policies are not present.
+        """
+        api = _API
+        query = self.build_query(names)
+        query['fields'] = self.build_fields(['name'])
+        records, error = rest_generic.get_0_or_more_records(self.rest_api, api, query)
+        if error:
+            msg = "Error in get_service_policies: %s" % error
+            self.module.fail_json(msg=msg)
+        return dict((record['name'], self.format_record(record)) for record in records or [])
 
-        for attr in ('ipspace', 'scope', 'services'):
-            value = self.parameters.get(attr)
-            if value is not None:
-                body[attr] = value
+    def build_fields(self, extra_fields=None):
+        """name, svm, ipspace, and scope are already matched by the query.
+           services is only needed to check for a modification.
+        """
+        fields = ['uuid'] + (extra_fields or [])
+        if self.parameters['state'] == 'present' and self.parameters.get('services') is not None:
+            fields.append('services')
+        return ','.join(fields)
+
+    @staticmethod
+    def format_record(record):
+        current = dict((key, record[key]) for key in ('uuid', 'name', 'services') if key in record)
+        if current.get('services'):
+            # same canonical ordering as in validate_inputs
+            current['services'] = sorted(current['services'])
+        return current
+
+    def get_current_from_fact(self):
+        fact = self.parameters['current_fact']
+        if not fact:
+            return None
+        # make sure the record is for this policy, as the PATCH uses its uuid
+        svm_name = self.na_helper.safe_get(fact, ['svm', 'name'])
+        ipspace = self.na_helper.safe_get(fact, ['ipspace', 'name'])
+        required = [('uuid', fact.get('uuid')), ('name', fact.get('name')), ('scope', fact.get('scope')), ('ipspace.name', ipspace)]
+        if self.parameters['scope'] == 'svm':
+            required.append(('svm.name', svm_name))
+        missing = [key for key, value in required if value is None]
+        if missing:
+            self.module.fail_json(msg='Error: %s required in current_fact, got: %s' % (', '.join(missing), fact))
+        mismatches = []
+        if fact['name'] != self.parameters['name']:
+            mismatches.append('name: %s' % fact['name'])
+        if svm_name != self.parameters.get('vserver'):
+            mismatches.append('svm.name: %s' % svm_name)
+        if fact['scope'] != self.parameters['scope']:
+            mismatches.append('scope: %s' % fact['scope'])
+        if self.parameters.get('ipspace') is not None and ipspace != self.parameters['ipspace']:
+            mismatches.append('ipspace.name: %s' % ipspace)
+        if mismatches:
+            self.module.fail_json(msg='Error: current_fact does not match the service policy %s, got %s.' % (self.parameters['name'], ', '.join(mismatches)))
+        return self.format_record(fact)
+
+    def build_create_body(self, name):
+        # set_parameters does not keep None values
+        body = dict((attr, self.parameters[attr]) for attr in ('ipspace', 'scope', 'services') if attr in self.parameters)
+        body['name'] = name
+        if 'vserver' in self.parameters:
+            body['svm.name'] = self.parameters['vserver']
+        return body
 
+    def create_service_policy(self):
+        api = _API
+        body = self.build_create_body(self.parameters['name'])
         dummy, error = rest_generic.post_async(self.rest_api, api, body)
         if error:
             msg = "Error in create_service_policy: %s" % error
             self.module.fail_json(msg=msg)
 
-    def modify_service_policy(self, current, modify):
-        # sourcery skip: dict-comprehension
-        api = 'network/ip/service-policies/%s' % current['uuid']
-        modify_copy = dict(modify)
-        body = {}
-        for key in modify:
-            if key in ('services',):
-                body[key] = modify_copy.pop(key)
-        if modify_copy:
-            msg = 'Error: attributes not supported in modify: %s' % modify_copy
+    def create_service_policies(self, names):
+        """Create all the policies in names with a single POST"""
+        api = _API
+        body = {'records': [self.build_create_body(name) for name in names]}
+        dummy, error = rest_generic.post_async(self.rest_api, api, body)
+        if error:
+            msg = "Error in create_service_policies: %s" % error
+            self.module.fail_json(msg=msg)
+
+    def build_modify_body(self, modify):
+        body = dict((key, value) for key, value in modify.items() if key in _MODIFIABLE_ATTRS)
+        if len(body) < len(modify):
+            unsupported = dict((key, value) for key, value in modify.items() if key not in _MODIFIABLE_ATTRS)
+            msg = 'Error: attributes not supported in modify: %s' % unsupported
             self.module.fail_json(msg=msg)
         if not body:
             msg = 'Error: nothing to change - modify called with: %s' % modify
             self.module.fail_json(msg=msg)
+        return body
 
+    def patch_service_policy(self, current, body):
+        """Returns an error rather than failing, as it may run in a worker thread"""
+        api = '%s/%s' % (_API, current['uuid'])
         dummy, error = rest_generic.patch_async(self.rest_api, api, None, body)
+        return error
+
+    def modify_service_policy(self, current, modify):
+        error = self.patch_service_policy(current, self.build_modify_body(modify))
         if error:
             msg = "Error in modify_service_policy: %s" % error
             self.module.fail_json(msg=msg)
 
-    def delete_service_policy(self, current):
-        api = 'network/ip/service-policies/%s' % current['uuid']
+    def modify_service_policies(self, current, modify):
+        """PATCH each policy in modify, concurrently when concurrent.futures is available.
+           Errors are reported together once all requests are completed.
+        """
+        bodies = dict((name, self.build_modify_body(modify_one)) for name, modify_one in modify.items())
+        if HAS_FUTURES and len(bodies) > 1:
+            with ThreadPoolExecutor(max_workers=min(_MAX_WORKERS, len(bodies))) as executor:
+                futures = dict((name, executor.submit(self.patch_service_policy, current[name], body)) for name, body in bodies.items())
+                errors = dict((name, future.result()) for name, future in futures.items())
+        else:
+            errors = dict((name, self.patch_service_policy(current[name], body)) for name, body in bodies.items())
+        errors = ['%s: %s' % (name, error) for name, error in sorted(errors.items()) if error]
+        if errors:
+            msg = "Error in modify_service_policies: %s" % '  '.join(errors)
+            self.module.fail_json(msg=msg)
 
-        dummy, error = rest_generic.delete_async(self.rest_api, api, None, None)
+    def delete_service_policy(self, names=None):
+        """Delete the policy, or all the policies in names, with a query based DELETE, saving the GET to find the UUID.
+           Returns 'delete' if a policy was deleted, None otherwise.
+        """
+        api = _API
+        response, error = rest_generic.delete_async(self.rest_api, api, None, self.build_query(names))
         if error:
             msg = "Error in delete_service_policy: %s" % error
             self.module.fail_json(msg=msg)
+        if response and rrh.get_num_records(response) > 0:
+            self.na_helper.changed = True
+            return 'delete'
+        return None
 
     def get_actions(self):
         """Determines whether a create, delete, modify action is required
         """
         cd_action, modify, current = None, None, None
-        current = self.get_service_policy()
+        current = self.get_current_from_fact() if 'current_fact' in self.parameters else self.get_service_policy()
         cd_action = self.na_helper.get_cd_action(current, self.parameters)
         if cd_action is None:
             modify = self.na_helper.get_modified_attributes(current, self.parameters)
         return cd_action, modify, current
 
+    def get_batch_actions(self):
+        """Determines the create, delete, modify actions for each policy in names
+        """
+        current = self.get_service_policies(self.parameters['names'])
+        actions, modify = {}, {}
+        for name in self.parameters['names']:
+            cd_action = self.na_helper.get_cd_action(current.get(name), self.parameters)
+            if cd_action is not None:
+                actions[name] = cd_action
+            elif current.get(name) is not None:
+                modify_one = self.na_helper.get_modified_attributes(current[name], self.parameters)
+                if modify_one:
+                    modify[name] = modify_one
+        return actions, modify, current
+
+    def apply_batch(self):
+        actions, modify, current = self.get_batch_actions()
+        if self.na_helper.changed and not self.module.check_mode:
+            creates = [name for name, action in actions.items() if action == 'create']
+            deletes = [name for name, action in actions.items() if action == 'delete']
+            if creates:
+                self.create_service_policies(creates)
+            if deletes:
+                self.delete_service_policy(deletes)
+            if modify:
+                self.modify_service_policies(current, modify)
+        result = netapp_utils.generate_result(self.na_helper.changed, actions, modify, extra_responses={'scope': self.module.params})
+        self.module.exit_json(**result)
+
     def apply(self):
-        cd_action, modify, current = self.get_actions()
+        if self.parameters.get('names') is not None:
+            self.apply_batch()
+            return
+        if self.parameters['state'] == 'absent' and not self.module.check_mode:
+            # no need to fetch the UUID, a query based DELETE is a single round trip
+            cd_action, modify = self.delete_service_policy(), None
+        else:
+            cd_action, modify, current = self.get_actions()
 
-        if self.na_helper.changed and not self.module.check_mode:
-            if cd_action == 'create':
-                self.create_service_policy()
-            elif cd_action == 'delete':
-                self.delete_service_policy(current)
-            elif modify:
-                self.modify_service_policy(current, modify)
+            if self.na_helper.changed and not self.module.check_mode:
+                if cd_action == 'create':
+                    self.create_service_policy()
+                elif modify:
+                    self.modify_service_policy(current, modify)
         result = netapp_utils.generate_result(self.na_helper.changed, cd_action, modify, extra_responses={'scope': self.module.params})
         self.module.exit_json(**result)
 
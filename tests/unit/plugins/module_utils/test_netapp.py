@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 from ansible.module_utils import basic
+from ansible_collections.netapp.ontap.tests.unit.compat.mock import patch
 from ansible_collections.netapp.ontap.tests.unit.plugins.module_utils.ansible_mocks import \
     patch_ansible, create_module, expect_and_capture_ansible_exception
 from ansible_collections.netapp.ontap.tests.unit.framework.mock_rest_and_zapi_requests import patch_request_and_invoke
@@ -179,3 +180,13 @@ def test_set_auth_method():
     # keyfile but no cert
     error = expect_and_capture_ansible_exception(netapp_utils.set_auth_method, 'fail', create_ontap_module(args), None, None, None, 'keyfile')['msg']
     assert 'Error: cannot have a key file without a cert file' in error
+
+
+@patch('ansible_collections.netapp.ontap.plugins.module_utils.netapp.HAS_HTTPX', False)
+def test_http2_missing_library():
+    ''' httpx is only required with use_http2 '''
+    module = create_ontap_module(DEFAULT_ARGS)
+    assert netapp_utils.OntapRestAPI(module).use_http2 is False
+    module = create_ontap_module(DEFAULT_ARGS, {'feature_flags': {'use_http2': True}})
+    error = 'Failed to import the required Python library (httpx[http2])'
+    assert error in expect_and_capture_ansible_exception(netapp_utils.OntapRestAPI, 'fail', module)['msg']
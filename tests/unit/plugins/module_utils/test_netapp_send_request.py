@@ -54,6 +54,20 @@ def create_restapi_object(default_args):
     return netapp_utils.OntapRestAPI(module.module)
 
 
+@pytest.fixture(autouse=True)
+def clear_rest_api_caches():
+    ''' each test starts without pooled sessions or ETags '''
+    netapp_utils.OntapRestAPI._sessions.clear()
+    netapp_utils.OntapRestAPI._etags.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_orjson():
+    ''' mockResponse provides json(), but content is not encoded '''
+    with patch('ansible_collections.netapp.ontap.plugins.module_utils.netapp.HAS_ORJSON', False):
+        yield
+
+
 class mockResponse:
     def __init__(self, json_data, status_code, raise_action=None, headers=None, text=None):
         self.json_data = json_data
@@ -73,7 +87,7 @@ class mockResponse:
         return self.json_data
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_empty_get_sent_bad_json(mock_request):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data='anything', status_code=200, raise_action='bad_json')
@@ -85,7 +99,7 @@ def test_empty_get_sent_bad_json(mock_request):
     print('debug:', rest_api.debug_logs)
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_empty_get_sent_bad_but_empty_json(mock_request):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data='', status_code=200, raise_action='bad_json')
@@ -105,7 +119,7 @@ def test_wait_on_job_bad_url():
 
 
 @patch('time.sleep')
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_wait_on_job_timeout(mock_request, sleep_mock):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data='', status_code=200, raise_action='bad_json')
@@ -118,7 +132,7 @@ def test_wait_on_job_timeout(mock_request, sleep_mock):
 
 
 @patch('time.sleep')
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_wait_on_job_job_error(mock_request, sleep_mock):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data=dict(error='Job error message'), status_code=200)
@@ -131,7 +145,7 @@ def test_wait_on_job_job_error(mock_request, sleep_mock):
 
 
 @patch('time.sleep')
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_wait_on_job_job_failure(mock_request, dont_sleep):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data=dict(error='Job error message', state='failure', message='failure message'), status_code=200)
@@ -145,7 +159,7 @@ def test_wait_on_job_job_failure(mock_request, dont_sleep):
 
 
 @patch('time.sleep')
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_wait_on_job_timeout_running(mock_request, sleep_mock):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data=dict(error='Job error message', state='running', message='any message'), status_code=200)
@@ -159,7 +173,7 @@ def test_wait_on_job_timeout_running(mock_request, sleep_mock):
 
 
 @patch('time.sleep')
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_wait_on_job(mock_request, dont_sleep):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data=dict(error='Job error message', state='other', message='any message'), status_code=200)
@@ -172,7 +186,7 @@ def test_wait_on_job(mock_request, dont_sleep):
     assert message == 'any message'
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_get_auth_single_cert(mock_request):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data='', status_code=200)
@@ -185,7 +199,7 @@ def test_get_auth_single_cert(mock_request):
     assert "cert='cert_file'" in str(mock_request.mock_calls[0])
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_get_auth_cert_key(mock_request):
     ''' get with no data '''
     mock_request.return_value = mockResponse(json_data='', status_code=200)
@@ -206,7 +220,7 @@ def test_get_auth_method_keyerror():
     assert expect_and_capture_ansible_exception(my_cx.send_request, KeyError, *args) == 'invalid_method'
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_http_error_no_json(mock_request):
     ''' get raises HTTPError '''
     mock_request.return_value = mockResponse(json_data={}, status_code=400)
@@ -216,7 +230,7 @@ def test_http_error_no_json(mock_request):
     assert error == 'status_code: 400'
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_http_error_with_json_error_field(mock_request):
     ''' get raises HTTPError '''
     mock_request.return_value = mockResponse(json_data=dict(state='other', message='any message', error='error_message'), status_code=400)
@@ -226,7 +240,7 @@ def test_http_error_with_json_error_field(mock_request):
     assert error == 'error_message'
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_http_error_attribute_error(mock_request):
     ''' get raises HTTPError '''
     mock_request.return_value = mockResponse(json_data='bad_data', status_code=400)
@@ -236,7 +250,7 @@ def test_http_error_attribute_error(mock_request):
     assert error == 'status_code: 400'
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_connection_error(mock_request):
     ''' get raises HTTPError '''
     mock_request.side_effect = netapp_utils.requests.exceptions.ConnectionError('connection_error')
@@ -248,7 +262,7 @@ def test_connection_error(mock_request):
     # assert False
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_options_allow_in_header(mock_request):
     ''' OPTIONS returns Allow key '''
     mock_request.return_value = mockResponse(json_data={}, headers={'Allow': 'allowed'}, status_code=200)
@@ -259,7 +273,7 @@ def test_options_allow_in_header(mock_request):
     assert message == {'Allow': 'allowed'}
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_formdata_in_response(mock_request):
     ''' GET return formdata '''
     mock_request.return_value = mockResponse(
@@ -269,3 +283,115 @@ def test_formdata_in_response(mock_request):
     message, error = rest_api.get(api)
     assert error is None
     assert message == {'text': 'testme'}
+
+
+def test_session_is_shared():
+    ''' same hostname and username reuse the same pooled session '''
+    rest_api = create_restapi_object(DEFAULT_ARGS)
+    session = rest_api.get_session()
+    assert rest_api.get_session() is session
+    assert create_restapi_object(DEFAULT_ARGS).get_session() is session
+    other_args = dict(DEFAULT_ARGS, hostname='other')
+    assert create_restapi_object(other_args).get_session() is not session
+    adapter = session.get_adapter('https://test/api/')
+    retries = adapter.max_retries
+    assert retries.total == 3
+    assert retries.connect == 3
+    # read timeouts are not retried, DELETE and other non read only methods are not retried on 5xx
+    assert retries.read == 0
+    assert retries.is_retry('GET', 503)
+    assert not retries.is_retry('DELETE', 503)
+    assert not retries.is_retry('PATCH', 503)
+
+
+@pytest.mark.skipif(not netapp_utils.HAS_HTTPX, reason='requires httpx[http2]')
+@patch('httpx.Client.request')
+def test_http2_get(mock_request):
+    ''' use_http2 sends the request with httpx, verify and cert are set on the client '''
+    mock_request.return_value = mockResponse(json_data={'key': 'value'}, status_code=200)
+    rest_api = create_restapi_object(dict(DEFAULT_ARGS, feature_flags={'use_http2': True}))
+    message, error = rest_api.get('api/testme')
+    assert error is None
+    assert message == {'key': 'value'}
+    client = rest_api.get_session()
+    assert isinstance(client, netapp_utils.httpx.Client)
+    assert create_restapi_object(dict(DEFAULT_ARGS, feature_flags={'use_http2': True})).get_session() is client
+    args, kwargs = mock_request.call_args
+    assert args == ('GET', 'https://test/api/api/testme')
+    assert kwargs['auth'] == ('test_user', 'test_pass!')
+    assert 'verify' not in kwargs
+
+
+@pytest.mark.skipif(not netapp_utils.HAS_HTTPX, reason='requires httpx[http2]')
+@patch('httpx.Client.request')
+def test_http2_errors(mock_request):
+    ''' httpx errors are reported like requests errors '''
+    httpx = netapp_utils.httpx
+    mock_request.side_effect = httpx.ConnectError('connection_error')
+    rest_api = create_restapi_object(dict(DEFAULT_ARGS, feature_flags={'use_http2': True}))
+    message, error = rest_api.get('api/testme')
+    assert error == 'connection_error'
+    request = httpx.Request('GET', 'https://test/api/testme')
+    mock_request.side_effect = None
+    mock_request.return_value = httpx.Response(500, request=request)
+    message, error = rest_api.get('api/testme')
+    assert 'Server error' in error
+
+
+@pytest.mark.skipif(not netapp_utils.HAS_HTTPX, reason='requires httpx[http2]')
+@patch('httpx.Client.request')
+def test_http2_params_encoding(mock_request):
+    ''' None values are dropped and booleans are sent as True/False, like requests does '''
+    httpx = netapp_utils.httpx
+    mock_request.return_value = mockResponse(json_data={'key': 'value'}, status_code=200)
+    rest_api = create_restapi_object(dict(DEFAULT_ARGS, feature_flags={'use_http2': True}))
+    params = {'fields': 'name', 'return_records': True, 'force': False, 'max_records': None, 'svm.name': ['vs1', None, 'vs2']}
+    message, error = rest_api.get('api/testme', params)
+    assert error is None
+    args, kwargs = mock_request.call_args
+    assert kwargs['params'] == {'fields': 'name', 'return_records': 'True', 'force': 'False', 'svm.name': ['vs1', 'vs2']}
+    url = 'https://test/api/testme'
+    assert str(httpx.Request('GET', url, params=kwargs['params']).url) == netapp_utils.requests.Request('GET', url, params=params).prepare().url
+
+
+@pytest.mark.skipif(not netapp_utils.HAS_ORJSON, reason='requires orjson')
+@patch('requests.Session.request')
+def test_orjson_decode(mock_request):
+    ''' orjson decodes response.content '''
+    mock_request.return_value = mockResponse(json_data=b'{"key": "value"}', status_code=200, raise_action='bad_json')
+    rest_api = create_restapi_object(DEFAULT_ARGS)
+    with patch('ansible_collections.netapp.ontap.plugins.module_utils.netapp.HAS_ORJSON', True):
+        message, error = rest_api.get('api/testme')
+        assert error is None
+        assert message == {'key': 'value'}
+        mock_request.return_value = mockResponse(json_data=b'', status_code=200)
+        message, error = rest_api.get('api/testme')
+        assert error is None
+        assert message == {}
+        mock_request.return_value = mockResponse(json_data=b'anything', status_code=200)
+        message, error = rest_api.get('api/testme')
+        assert 'Expecting json, got: ' in error
+
+
+@patch('requests.Session.request')
+def test_conditional_get_with_etag(mock_request):
+    ''' If-None-Match is sent when an ETag was received, and the previous response is used on 304 '''
+    mock_request.return_value = mockResponse(json_data={'key': 'value'}, status_code=200, headers={'ETag': 'etag1'})
+    rest_api = create_restapi_object(DEFAULT_ARGS)
+    api = 'api/test_etag'
+    message, error = rest_api.get(api, {'fields': 'key'})
+    assert error is None
+    assert message == {'key': 'value'}
+    assert 'If-None-Match' not in mock_request.call_args[1]['headers']
+    mock_request.return_value = mockResponse(json_data='', status_code=304)
+    message, error = rest_api.get(api, {'fields': 'key'})
+    assert error is None
+    assert message == {'key': 'value'}
+    assert mock_request.call_args[1]['headers']['If-None-Match'] == 'etag1'
+    # the cached response is not shared with the caller
+    message['key'] = 'changed'
+    message, error = rest_api.get(api, {'fields': 'key'})
+    assert message == {'key': 'value'}
+    # a different query is not conditional
+    message, error = rest_api.get(api, {'fields': 'other'})
+    assert 'If-None-Match' not in mock_request.call_args[1]['headers']
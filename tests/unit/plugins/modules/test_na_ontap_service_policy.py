@@ -12,7 +12,7 @@ import sys
 from ansible_collections.netapp.ontap.tests.unit.compat.mock import patch
 import ansible_collections.netapp.ontap.plugins.module_utils.netapp as netapp_utils
 from ansible_collections.netapp.ontap.tests.unit.framework.mock_rest_and_zapi_requests import\
-    patch_request_and_invoke, register_responses
+    get_mock_record, patch_request_and_invoke, register_responses
 from ansible_collections.netapp.ontap.tests.unit.framework.rest_factory import rest_error_message, rest_responses
 from ansible_collections.netapp.ontap.tests.unit.plugins.module_utils.ansible_mocks import\
     assert_no_warnings, expect_and_capture_ansible_exception, call_main, create_module, patch_ansible
@@ -46,6 +46,26 @@ SRR = rest_responses({
         }],
         'num_records': 1
     }, None),
+    'two_sp_records_full': (200, {
+        "records": [
+            {
+                'name': 'sp123',
+                'uuid': 'uuid123',
+                'svm': dict(name='vserver'),
+                'services': ['data_core'],
+                'scope': 'svm',
+                'ipspace': dict(name='ipspace')
+            },
+            {
+                'name': 'sp124',
+                'uuid': 'uuid124',
+                'svm': dict(name='vserver'),
+                'services': ['data_nfs'],
+                'scope': 'svm',
+                'ipspace': dict(name='ipspace')
+            }],
+        'num_records': 2
+    }, None),
     'two_sp_records': (200, {
         "records": [
             {
@@ -64,8 +84,8 @@ def test_module_fail_when_required_args_missing():
     module_args = {
         'hostname': ''
     }
-    error = 'missing required arguments: name'
-    assert error == call_main(my_main, module_args, fail=True)['msg']
+    error = 'one of the following is required: name, names'
+    assert error in call_main(my_main, module_args, fail=True)['msg']
 
 
 def test_ensure_get_called():
@@ -153,8 +173,7 @@ def test_ensure_modify_called_no_service():
 def test_ensure_delete_called():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
-        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
-        ('DELETE', 'network/ip/service-policies/uuid123', SRR['empty_good']),
+        ('DELETE', 'network/ip/service-policies', SRR['one_record']),
     ])
     module_args = {
         'state': 'absent',
@@ -167,7 +186,7 @@ def test_ensure_delete_called():
 def test_ensure_delete_idempotent():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
-        ('GET', 'network/ip/service-policies', SRR['zero_records']),
+        ('DELETE', 'network/ip/service-policies', SRR['zero_records']),
     ])
     module_args = {
         'state': 'absent',
@@ -177,6 +196,38 @@ def test_ensure_delete_idempotent():
     assert_no_warnings()
 
 
+def test_ensure_delete_query():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('DELETE', 'network/ip/service-policies', SRR['one_record']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'vserver': 'vserver',
+        'ipspace': 'ipspace',
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    assert my_obj.delete_service_policy() == 'delete'
+    query = next(get_mock_record().get_requests(method='DELETE'))['params']
+    assert query['name'] == 'sp123'
+    assert query['svm.name'] == 'vserver'
+    assert query['ipspace.name'] == 'ipspace'
+
+
+def test_delete_check_mode():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'vserver': 'vserver',
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args, check_mode=True)
+    assert expect_and_capture_ansible_exception(my_obj.apply, 'exit')['changed'] is True
+    assert_no_warnings()
+
+
 def test_negative_extra_record():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
@@ -304,18 +355,40 @@ def test_negative_no_service_not_alone_with_cluster_scope():
 def test_negative_extra_arg_in_modify():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
-        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
     ])
     module_args = {
         'ipspace': 'ipspace',
         'scope': 'cluster',
         'services': ['data_nfs'],
     }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    current = dict(uuid='uuid123')
+    modify = {'scope': 'cluster', 'services': ['data_nfs']}
     error = "Error: attributes not supported in modify: {'scope': 'cluster'}"
-    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+    assert error in expect_and_capture_ansible_exception(my_obj.modify_service_policy, 'fail', current, modify)['msg']
     assert_no_warnings()
 
 
+def test_get_fields():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
+    ])
+    module_args = {
+        'services': ['data_core'],
+        'vserver': 'vserver',
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    assert my_obj.get_service_policy() == {'uuid': 'uuid123', 'name': 'sp123', 'services': ['data_core']}
+    assert next(get_mock_record().get_requests(method='GET', api='network/ip/service-policies'))['params']['fields'] == 'uuid,services'
+    assert my_obj.build_fields(['name']) == 'uuid,name,services'
+    my_obj.parameters['state'] = 'absent'
+    assert my_obj.build_fields() == 'uuid'
+    my_obj.parameters['state'] = 'present'
+    my_obj.parameters.pop('services')
+    assert my_obj.build_fields() == 'uuid'
+
+
 def test_negative_empty_body_in_modify():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
@@ -352,14 +425,13 @@ def test_negative_create_called():
 def test_negative_delete_called():
     register_responses([
         ('GET', 'cluster', SRR['is_rest_9_8_0']),
-        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
-        ('DELETE', 'network/ip/service-policies/uuid123', SRR['generic_error']),
+        ('DELETE', 'network/ip/service-policies', SRR['generic_error']),
     ])
     module_args = {
         'state': 'absent',
         'vserver': 'vserver',
     }
-    error = rest_error_message('Error in delete_service_policy', 'network/ip/service-policies/uuid123')
+    error = rest_error_message('Error in delete_service_policy', 'network/ip/service-policies')
     assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
     assert_no_warnings()
 
@@ -401,3 +473,351 @@ def test_negative_unknown_services():
         assert needle in error
     assert 'data_cifs' not in error
     assert_no_warnings()
+
+
+def test_batch_create_and_modify():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['two_sp_records_full']),
+        ('POST', 'network/ip/service-policies', SRR['empty_good']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['empty_good']),
+    ])
+    module_args = {
+        'names': ['sp123', 'sp124', 'sp125', 'sp126'],
+        'services': ['data_nfs'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    result = call_main(my_main, args, module_args)
+    assert result['changed'] is True
+    assert result['actions'] == {'sp125': 'create', 'sp126': 'create'}
+    assert result['modify'] == {'sp123': {'services': ['data_nfs']}}
+    assert next(get_mock_record().get_requests(method='GET', api='network/ip/service-policies'))['params']['name'] == 'sp123|sp124|sp125|sp126'
+    records = next(get_mock_record().get_requests(method='POST'))['json']['records']
+    assert [record['name'] for record in records] == ['sp125', 'sp126']
+    assert_no_warnings()
+
+
+def test_batch_idempotent():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['two_sp_records_full']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'names': ['sp125', 'sp126'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    assert call_main(my_main, args, module_args)['changed'] is False
+
+
+def test_batch_delete():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['two_sp_records_full']),
+        ('DELETE', 'network/ip/service-policies', SRR['empty_good']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'names': ['sp123', 'sp124', 'sp125'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    result = call_main(my_main, args, module_args)
+    assert result['changed'] is True
+    assert result['actions'] == {'sp123': 'delete', 'sp124': 'delete'}
+    assert next(get_mock_record().get_requests(method='DELETE'))['params']['name'] == 'sp123|sp124'
+
+
+def test_negative_batch_errors():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['generic_error']),
+        ('POST', 'network/ip/service-policies', SRR['generic_error']),
+    ])
+    module_args = {
+        'names': ['sp123', 'sp124'],
+        'services': ['data_nfs'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    my_obj = create_module(my_module, args, module_args)
+    error = rest_error_message('Error in get_service_policies', 'network/ip/service-policies')
+    assert error in expect_and_capture_ansible_exception(my_obj.get_service_policies, 'fail', ['sp123'])['msg']
+    error = rest_error_message('Error in create_service_policies', 'network/ip/service-policies')
+    assert error in expect_and_capture_ansible_exception(my_obj.create_service_policies, 'fail', ['sp123'])['msg']
+
+
+def test_negative_name_and_names():
+    module_args = {
+        'names': ['sp123'],
+        'vserver': 'vserver',
+    }
+    error = 'parameters are mutually exclusive: name|names'
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+
+
+def test_validate_inputs_canonical_services():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
+    ])
+    module_args = {
+        'services': ['data_core', 'data_cifs', 'data_core'],
+        'vserver': 'vserver',
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    assert my_obj.parameters['services'] == ['data_cifs', 'data_core']
+    module_args = {
+        'services': ['data_core', 'data_core'],
+        'vserver': 'vserver',
+    }
+    assert call_main(my_main, DEFAULT_ARGS, module_args)['changed'] is False
+
+
+def test_current_fact():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['empty_good']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('POST', 'network/ip/service-policies', SRR['empty_good']),
+    ])
+    module_args = {
+        'services': ['data_nfs'],
+        'vserver': 'vserver',
+        'current_fact': {'name': 'sp123', 'uuid': 'uuid123', 'services': ['data_core'], 'svm': {'name': 'vserver'}, 'scope': 'svm',
+                         'ipspace': {'name': 'ipspace'}},
+    }
+    result = call_main(my_main, DEFAULT_ARGS, module_args)
+    assert result['changed'] is True
+    assert result['modify'] == {'services': ['data_nfs']}
+    module_args['current_fact'] = {}
+    result = call_main(my_main, DEFAULT_ARGS, module_args)
+    assert result['changed'] is True
+    assert result['actions'] == 'create'
+
+
+def test_current_fact_idempotent():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'services': ['data_core'],
+        'vserver': 'vserver',
+        'current_fact': {'name': 'sp123', 'uuid': 'uuid123', 'services': ['data_core'], 'svm': {'name': 'vserver'}, 'scope': 'svm',
+                         'ipspace': {'name': 'ipspace'}},
+    }
+    assert call_main(my_main, DEFAULT_ARGS, module_args)['changed'] is False
+
+
+def test_negative_current_fact():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'services': ['data_core'],
+        'vserver': 'vserver',
+        'current_fact': {'name': 'sp123'},
+    }
+    error = "Error: uuid, scope, ipspace.name, svm.name required in current_fact, got: {'name': 'sp123'}"
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+
+
+def test_negative_current_fact_mismatch():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'services': ['data_core'],
+        'vserver': 'vserver',
+        'current_fact': {'name': 'sp124', 'uuid': 'uuid124', 'svm': {'name': 'other'}, 'scope': 'cluster', 'ipspace': {'name': 'ipspace'}},
+    }
+    error = 'Error: current_fact does not match the service policy sp123, got name: sp124, svm.name: other, scope: cluster.'
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+
+
+def test_negative_current_fact_ipspace_mismatch():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    # cluster scoped policies with the same name exist in each ipspace
+    module_args = {
+        'name': 'default-management',
+        'services': ['management_core'],
+        'ipspace': 'ips1',
+        'current_fact': {'name': 'default-management', 'uuid': 'uuid_default', 'scope': 'cluster', 'ipspace': {'name': 'Default'}},
+    }
+    error = 'Error: current_fact does not match the service policy default-management, got ipspace.name: Default.'
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+    module_args['current_fact'] = {'name': 'default-management', 'uuid': 'uuid_default', 'scope': 'cluster'}
+    error = "Error: ipspace.name required in current_fact"
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']
+
+
+def test_services_order_is_ignored():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'services': ['data_nfs', 'data_core'],
+        'vserver': 'vserver',
+        'current_fact': {'name': 'sp123', 'uuid': 'uuid123', 'services': ['data_nfs', 'data_cifs', 'data_core'], 'scope': 'svm',
+                         'svm': {'name': 'vserver'}, 'ipspace': {'name': 'ipspace'}},
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    cd_action, modify, current = my_obj.get_actions()
+    assert current['services'] == ['data_cifs', 'data_core', 'data_nfs']
+    assert modify == {'services': ['data_core', 'data_nfs']}
+    my_obj.parameters['services'] = ['data_cifs', 'data_core', 'data_nfs']
+    cd_action, modify, current = my_obj.get_actions()
+    assert cd_action is None
+    assert not modify
+
+
+@patch('ansible_collections.netapp.ontap.plugins.modules.na_ontap_service_policy._MAX_WORKERS', 1)
+def test_batch_modify_concurrent():
+    # a single worker keeps the order of the requests
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['two_sp_records_full']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['empty_good']),
+        ('PATCH', 'network/ip/service-policies/uuid124', SRR['empty_good']),
+    ])
+    module_args = {
+        'names': ['sp123', 'sp124'],
+        'services': ['data_cifs'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    result = call_main(my_main, args, module_args)
+    assert result['changed'] is True
+    assert result['modify'] == {'sp123': {'services': ['data_cifs']}, 'sp124': {'services': ['data_cifs']}}
+
+
+@patch('ansible_collections.netapp.ontap.plugins.modules.na_ontap_service_policy._MAX_WORKERS', 1)
+def test_negative_batch_modify_errors_are_aggregated():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['generic_error']),
+        ('PATCH', 'network/ip/service-policies/uuid124', SRR['generic_error']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['generic_error']),
+    ])
+    module_args = {
+        'names': ['sp123', 'sp124'],
+        'services': ['data_cifs'],
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    my_obj = create_module(my_module, args, module_args)
+    current = {'sp123': {'uuid': 'uuid123', 'name': 'sp123'}, 'sp124': {'uuid': 'uuid124', 'name': 'sp124'}}
+    modify = {'sp123': {'services': ['data_cifs']}, 'sp124': {'services': ['data_cifs']}}
+    error = expect_and_capture_ansible_exception(my_obj.modify_service_policies, 'fail', current, modify)['msg']
+    assert error.startswith('Error in modify_service_policies: sp123: ')
+    assert 'sp124: ' in error
+    # sequential fallback
+    with patch('ansible_collections.netapp.ontap.plugins.modules.na_ontap_service_policy.HAS_FUTURES', False):
+        modify = {'sp123': {'services': ['data_cifs']}}
+        error = expect_and_capture_ansible_exception(my_obj.modify_service_policies, 'fail', current, modify)['msg']
+        assert error.startswith('Error in modify_service_policies: sp123: ')
+
+
+def test_build_create_body():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'services': ['no_service'],
+        'vserver': 'vserver',
+    }
+    my_obj = create_module(my_module, DEFAULT_ARGS, module_args)
+    assert my_obj.build_create_body('sp123') == {'name': 'sp123', 'svm.name': 'vserver', 'scope': 'svm', 'services': []}
+    module_args = {
+        'ipspace': 'ipspace',
+    }
+    my_obj = create_module(my_module, dict(DEFAULT_ARGS, hostname='other'), module_args)
+    assert my_obj.build_create_body('sp123') == {'name': 'sp123', 'ipspace': 'ipspace', 'scope': 'cluster'}
+
+
+def test_services_field_only_when_needed():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'network/ip/service-policies', SRR['one_sp_record']),
+        ('PATCH', 'network/ip/service-policies/uuid123', SRR['empty_good']),
+    ])
+    # no services, only uuid is requested
+    module_args = {
+        'vserver': 'vserver',
+    }
+    assert call_main(my_main, DEFAULT_ARGS, module_args)['changed'] is False
+    # services is requested
+    module_args = {
+        'services': ['data_nfs'],
+        'vserver': 'vserver',
+    }
+    result = call_main(my_main, DEFAULT_ARGS, module_args)
+    assert result['changed'] is True
+    assert result['modify'] == {'services': ['data_nfs']}
+    fields = [request['params']['fields'] for request in get_mock_record().get_requests(method='GET', api='network/ip/service-policies')]
+    assert fields == ['uuid', 'uuid,services']
+
+
+def test_negative_query_operators_in_names():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'vserver': 'vserver',
+    }
+    error = 'Error: service policy names cannot contain ONTAP query operators (*, |, !, <, >, ..).  Got: sp*'
+    assert error in call_main(my_main, DEFAULT_ARGS, dict(module_args, name='sp*'), fail=True)['msg']
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    error = 'Error: service policy names cannot contain ONTAP query operators (*, |, !, <, >, ..).  Got: sp1|sp2, !sp3'
+    assert error in call_main(my_main, args, dict(module_args, names=['sp0', 'sp1|sp2', '!sp3']), fail=True)['msg']
+
+
+def test_negative_empty_names():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'vserver': 'vserver',
+    }
+    args = dict(DEFAULT_ARGS)
+    args.pop('name')
+    error = 'Error: service policy names cannot be empty.  Got: []'
+    assert error in call_main(my_main, args, dict(module_args, names=[]), fail=True)['msg']
+    error = "Error: service policy names cannot be empty.  Got: ['sp1', '']"
+    assert error in call_main(my_main, args, dict(module_args, names=['sp1', '']), fail=True)['msg']
+    error = "Error: service policy names cannot be empty.  Got: ['']"
+    assert error in call_main(my_main, DEFAULT_ARGS, dict(module_args, name=''), fail=True)['msg']
+
+
+def test_negative_range_operator_in_name():
+    register_responses([
+        ('GET', 'cluster', SRR['is_rest_9_8_0']),
+    ])
+    module_args = {
+        'state': 'absent',
+        'name': 'a..z',
+        'vserver': 'vserver',
+    }
+    error = 'Error: service policy names cannot contain ONTAP query operators (*, |, !, <, >, ..).  Got: a..z'
+    assert error in call_main(my_main, DEFAULT_ARGS, module_args, fail=True)['msg']